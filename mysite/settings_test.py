@@ -0,0 +1,45 @@
+"""
+Django settings for running the mysite test suite.
+
+Usage: pytest (see pytest.ini) or
+`python manage.py test --settings=mysite.settings_test`.
+"""
+
+from .settings import *  # noqa: F401,F403
+
+
+# Database
+# Keep the test database in RAM; TestCase rollbacks never touch the disk.
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': ':memory:',
+        'TEST': {
+            'NAME': ':memory:',
+        },
+    }
+}
+
+
+# Password hashing
+# A fast (and insecure) hasher keeps creating and logging in test users cheap.
+
+PASSWORD_HASHERS = [
+    'django.contrib.auth.hashers.MD5PasswordHasher',
+]
+
+
+# Migrations
+# Build the test schema straight from the current models instead of replaying
+# every migration.
+
+class DisableMigrations:
+    def __contains__(self, item):
+        return True
+
+    def __getitem__(self, item):
+        return None
+
+
+MIGRATION_MODULES = DisableMigrations()
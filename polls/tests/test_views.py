@@ -1,39 +1,68 @@
 import datetime
+from functools import lru_cache
 
+from django.db import transaction
 from django.test import TestCase
 from django.utils import timezone
-from django.urls import reverse
+from django.urls import reverse, reverse_lazy
 from django.contrib.auth import get_user_model
 
 from ..models import Question, Choice
 
-def create_question(question_text, days, number_of_choices=3):
+INDEX_URL = reverse_lazy("polls:index")
+
+@lru_cache(maxsize=None)
+def _detail_url(pk):
+    return reverse("polls:detail", args=(pk,))
+
+@lru_cache(maxsize=None)
+def _results_url(pk):
+    return reverse("polls:results", args=(pk,))
+
+@lru_cache(maxsize=None)
+def _vote_url(pk):
+    return reverse("polls:vote", args=(pk,))
+
+def create_question(question_text, days, number_of_choices=3, now=None):
     """
     Create a question with the given `question_text` and published the
-    given number of `days` offset to now (negative for questions published
+    given number of `days` offset to `now` (negative for questions published
     in the past, positive for questions that have yet to be published).
+    `now` defaults to the current time.
     """
-    time = timezone.now() + datetime.timedelta(days=days)
-    question = Question.objects.create(question_text=question_text, pub_date=time)
-    for choice in range(1, number_of_choices + 1):
-        Choice.objects.create(question=question, choice_text=f'Choice {choice}')
+    if now is None:
+        now = timezone.now()
+    time = now + datetime.timedelta(days=days)
+    with transaction.atomic(savepoint=False):
+        question = Question.objects.create(question_text=question_text, pub_date=time)
+        Choice.objects.bulk_create([
+            Choice(question=question, choice_text=f'Choice {choice}')
+            for choice in range(1, number_of_choices + 1)
+        ])
     return question
 
-def login_as_admin(self):
+def create_admin():
     User = get_user_model()
-    self.admin_user = User.objects.create_superuser(
+    return User.objects.create_superuser(
         username='admin',
         email='admin@example.com',
         password='password'
     )
-    self.client.login(username='admin', password='password')
+
+def login_as_admin(self):
+    self.client.force_login(self.admin_user)
 
 class QuestionIndexViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin_user = create_admin()
+
     def test_no_questions(self):
         """
         If no questions exist, an appropriate message is displayed.
         """
-        response = self.client.get(reverse("polls:index"))
+        with self.assertNumQueries(1):
+            response = self.client.get(INDEX_URL)
         self.assertEqual(response.status_code, 200)
         self.assertContains(response, "No polls are available.")
         self.assertQuerySetEqual(response.context["latest_question_list"], [])
@@ -44,10 +73,13 @@ class QuestionIndexViewTests(TestCase):
         are displayed on the index page.
         """
         question = create_question(question_text="Past Question", days=-2)
-        response = self.client.get(reverse("polls:index"))
+        with self.assertNumQueries(1):
+            response = self.client.get(INDEX_URL)
         self.assertQuerySetEqual(
             response.context["latest_question_list"],
-            [question],
+            [question.pk],
+            transform=lambda q: q.pk,
+            ordered=False,
         )
 
     def test_future_question(self):
@@ -56,7 +88,8 @@ class QuestionIndexViewTests(TestCase):
         the index page.
         """
         create_question(question_text="Future question.", days=30)
-        response = self.client.get(reverse("polls:index"))
+        with self.assertNumQueries(1):
+            response = self.client.get(INDEX_URL)
         self.assertContains(response, "No polls are available.")
         self.assertQuerySetEqual(response.context["latest_question_list"], [])
 
@@ -67,9 +100,10 @@ class QuestionIndexViewTests(TestCase):
         """
         create_question(question_text="Future question.", days=30)
         login_as_admin(self)
-        response = self.client.get(reverse("polls:index"))
+        with self.assertNumQueries(3):
+            response = self.client.get(INDEX_URL)
         self.assertContains(response, "Future question.")
-        self.assertEqual(response.context["latest_question_list"].count(), 1)
+        self.assertEqual(len(response.context["latest_question_list"]), 1)
 
     def test_future_question_and_past_question(self):
         """
@@ -78,10 +112,13 @@ class QuestionIndexViewTests(TestCase):
         """
         question = create_question(question_text="Past question.", days=-30)
         create_question(question_text="Future question.", days=30)
-        response = self.client.get(reverse("polls:index"))
+        with self.assertNumQueries(1):
+            response = self.client.get(INDEX_URL)
         self.assertQuerySetEqual(
             response.context["latest_question_list"],
-            [question],
+            [question.pk],
+            transform=lambda q: q.pk,
+            ordered=False,
         )
 
     def test_two_past_questions(self):
@@ -90,7 +127,8 @@ class QuestionIndexViewTests(TestCase):
         """
         question1 = create_question(question_text="Past question 1.", days=-30)
         question2 = create_question(question_text="Past question 2.", days=-5)
-        response = self.client.get(reverse("polls:index"))
+        with self.assertNumQueries(1):
+            response = self.client.get(INDEX_URL)
         self.assertQuerySetEqual(
             response.context["latest_question_list"],
             [question2, question1],
@@ -101,20 +139,27 @@ class QuestionIndexViewTests(TestCase):
         Questions with no choices are not displayed on the index page.
         """
         question = create_question(question_text="Past Question", days=-2, number_of_choices=0)
-        response = self.client.get(reverse("polls:index"))
+        with self.assertNumQueries(1):
+            response = self.client.get(INDEX_URL)
         self.assertEqual(response.status_code, 200)
         self.assertContains(response, "No polls are available.")
         self.assertQuerySetEqual(response.context["latest_question_list"], [])
 
 class QuestionDetailViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls._now = timezone.now()
+        cls.future_question = create_question(question_text="Future question.", days=5, now=cls._now)
+        cls.past_question = create_question(question_text="Past Question", days=-5, now=cls._now)
+
     def test_future_question(self):
         """
         The detail view of a question with a pub_date in the future
         returns a 404 not found.
         """
-        future_question = create_question(question_text="Future question.", days=5)
-        url = reverse("polls:detail", args=(future_question.id,)) # type: ignore
-        response = self.client.get(url)
+        url = _detail_url(self.future_question.id) # type: ignore
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
         self.assertEqual(response.status_code, 404)
 
     def test_past_question(self):
@@ -122,20 +167,26 @@ class QuestionDetailViewTests(TestCase):
         The detail view of a question with a pub_date in the past
         displays the question's text.
         """
-        past_question = create_question(question_text="Past Question", days=-5)
-        url = reverse("polls:detail", args=(past_question.id,)) # type: ignore
-        response = self.client.get(url)
+        url = _detail_url(self.past_question.id) # type: ignore
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
         self.assertContains(response, "Past Question")
 
 class QuestionResultsViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls._now = timezone.now()
+        cls.future_question = create_question(question_text="Future question.", days=5, now=cls._now)
+        cls.past_question = create_question(question_text="Past Question", days=-5, now=cls._now)
+
     def test_future_question(self):
         """
         The results view of a question with a pub_date in the future
         returns a 404 not found.
         """
-        future_question = create_question(question_text="Future question.", days=5)
-        url = reverse("polls:results", args=(future_question.id,)) # type: ignore
-        response = self.client.get(url)
+        url = _results_url(self.future_question.id) # type: ignore
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
         self.assertEqual(response.status_code, 404)
 
     def test_past_question(self):
@@ -143,9 +194,9 @@ class QuestionResultsViewTests(TestCase):
         The results view of a question with a pub_date in the past
         displays the question's text.
         """
-        past_question = create_question(question_text="Past Question", days=-5)
-        url = reverse("polls:results", args=(past_question.id,)) # type: ignore
-        response = self.client.get(url)
+        url = _results_url(self.past_question.id) # type: ignore
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
         self.assertContains(response, "Past Question")
 
     def test_vote_counting(self):
@@ -154,19 +205,18 @@ class QuestionResultsViewTests(TestCase):
         is incremented and shown in the results view.
         """
         question = create_question(question_text="Test the vote", days=-2)
-        url = reverse("polls:vote", args=(question.id,)) # type: ignore
-        choice = { 'choice': 2 }
+        url = _vote_url(question.id) # type: ignore
+        choice = { 'choice': question.choice_set.get(choice_text="Choice 2").pk } # type: ignore
         response = self.client.post(url, data=choice)
         self.assertEqual(response.status_code, 302)
-        self.assertRedirects(response, reverse('polls:results', args=(question.id,)))  # type: ignore
-        self.assertEqual(str(question.choice_set.get(pk=choice['choice'])), "Choice 2") # type: ignore
+        self.assertRedirects(response, _results_url(question.id))  # type: ignore
+        self.assertEqual(question.choice_set.get(pk=choice['choice']).votes, 1) # type: ignore
 
     def test_vote_missing(self):
         """
         If no vote is submitted, the server responds with a 422 status and
         returns the same form with an error message.
         """
-        question = create_question(question_text="Test the vote", days=-2)
-        url = reverse("polls:vote", args=(question.id,)) # type: ignore
+        url = _vote_url(self.past_question.id) # type: ignore
         response = self.client.post(url, data={})
         self.assertContains(response, "select a choice.", status_code=422)